@@ -1,16 +1,151 @@
 import sys
+from collections import deque
 import mido
 import comtypes
-from ctypes import cast, POINTER
-from comtypes import CLSCTX_ALL
+from ctypes import cast, byref, POINTER
+from comtypes import CLSCTX_ALL, COMObject, GUID
 from pycaw.pycaw import AudioUtilities, IAudioEndpointVolume, ISimpleAudioVolume
-from PySide6.QtCore import Qt, QTimer, Signal, Slot, QObject
-from PySide6.QtGui import QFont, QIcon
+from pycaw.api.audiopolicy import IAudioSessionEvents
+from pycaw.api.endpointvolume import IAudioEndpointVolumeCallback
+from PySide6.QtCore import Qt, QTimer, Signal, Slot, QObject, QRunnable, QThreadPool, QSignalBlocker
+from PySide6.QtGui import QFont, QIcon, QTextCursor, QPalette, QColor
 from PySide6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, 
                              QHBoxLayout, QLabel, QSlider, QPushButton, 
                              QComboBox, QFrame, QDialog, QMessageBox, QSystemTrayIcon, 
                              QMenu, QTabWidget, QTextEdit)
 
+def build_dark_palette():
+    """Build the application's dark color palette"""
+    palette = QPalette()
+    palette.setColor(QPalette.Window, QColor("#1e1e1e"))
+    palette.setColor(QPalette.WindowText, Qt.white)
+    palette.setColor(QPalette.Base, QColor("#333"))
+    palette.setColor(QPalette.AlternateBase, QColor("#2a2a2a"))
+    palette.setColor(QPalette.Text, Qt.white)
+    palette.setColor(QPalette.Button, QColor("#333"))
+    palette.setColor(QPalette.ButtonText, Qt.white)
+    palette.setColor(QPalette.Highlight, QColor("#555"))
+    palette.setColor(QPalette.HighlightedText, Qt.white)
+    return palette
+
+
+# Theme colors come from the palette; the stylesheet only holds shapes and
+# the accent colors of individual widgets
+APP_QSS = """
+    QComboBox#appSelector, QComboBox#deviceCombo {
+        background-color: palette(base);
+        border: 1px solid #555;
+        border-radius: 4px;
+        padding: 4px;
+    }
+    QComboBox#deviceCombo {
+        padding: 6px;
+    }
+    QComboBox#appSelector::drop-down {
+        border: none;
+        width: 20px;
+    }
+    
+    QLabel#volumeLabel {
+        font-weight: bold;
+    }
+    QLabel#channelLabel, QLabel#deviceInfoLabel, QLabel#statusLabel {
+        color: #999;
+    }
+    QLabel#statusLabel[state="connected"] {
+        color: #00ff00;
+    }
+    QLabel#statusLabel[state="error"] {
+        color: #ff0000;
+    }
+    QLabel#mainTitle {
+        margin: 10px;
+    }
+    QLabel#dialogTitle {
+        margin-bottom: 15px;
+    }
+    
+    QSlider#fader::groove:vertical {
+        background: #444;
+        width: 30px;
+        border-radius: 4px;
+    }
+    QSlider#fader::handle:vertical {
+        background: #00a8ff;
+        height: 20px;
+        width: 40px;
+        margin: 0 -5px;
+        border-radius: 3px;
+    }
+    
+    QPushButton#muteButton {
+        background-color: palette(button);
+        border: 1px solid #555;
+        border-radius: 20px;
+        font-weight: bold;
+    }
+    QPushButton#muteButton:checked {
+        background-color: #bb0000;
+    }
+    QPushButton#muteButton:hover {
+        background-color: #444;
+    }
+    
+    QPushButton#changeDeviceButton, QPushButton#refreshAppsButton,
+    QPushButton#autoSelectButton, QPushButton#connectButton {
+        background-color: #2980b9;
+        border: none;
+        border-radius: 4px;
+        padding: 6px 12px;
+    }
+    QPushButton#changeDeviceButton:hover, QPushButton#refreshAppsButton:hover,
+    QPushButton#autoSelectButton:hover, QPushButton#connectButton:hover {
+        background-color: #3498db;
+    }
+    QPushButton#refreshDevicesButton {
+        background-color: #27ae60;
+        border: none;
+        border-radius: 4px;
+        padding: 8px 12px;
+    }
+    QPushButton#refreshDevicesButton:hover {
+        background-color: #2ecc71;
+    }
+    QPushButton#cancelButton {
+        background-color: #7f8c8d;
+        border: none;
+        border-radius: 4px;
+        padding: 8px 16px;
+    }
+    QPushButton#cancelButton:hover {
+        background-color: #95a5a6;
+    }
+    QPushButton#autoSelectButton {
+        padding: 8px 12px;
+    }
+    QPushButton#connectButton {
+        padding: 8px 16px;
+        font-weight: bold;
+    }
+    
+    QFrame#statusFrame, QFrame#statusFrame QLabel {
+        background-color: #222;
+        border-radius: 4px;
+    }
+    
+    QTextEdit#debugText {
+        background-color: #222;
+        color: #0f0;
+        font-family: Consolas, monospace;
+    }
+"""
+
+
+# Largest number of added plus removed apps that is patched into the app
+# selectors in place; bigger changes rebuild them
+MAX_PATCHED_APPS = 4
+
+
 class ChannelStrip(QWidget):
     def __init__(self, channel_idx, parent=None):
         super().__init__(parent)
@@ -26,29 +161,12 @@ class ChannelStrip(QWidget):
         # App selector
         self.app_selector = QComboBox()
         self.app_selector.setFixedHeight(30)
-        self.app_selector.setStyleSheet("""
-            QComboBox {
-                background-color: #333;
-                color: white;
-                border: 1px solid #555;
-                border-radius: 4px;
-                padding: 4px;
-            }
-            QComboBox::drop-down {
-                border: none;
-                width: 20px;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #333;
-                color: white;
-                selection-background-color: #555;
-            }
-        """)
+        self.app_selector.setObjectName("appSelector")
         
         # Volume label
         self.volume_label = QLabel("0%")
         self.volume_label.setAlignment(Qt.AlignCenter)
-        self.volume_label.setStyleSheet("color: white; font-weight: bold;")
+        self.volume_label.setObjectName("volumeLabel")
         
         # Fader
         self.fader = QSlider(Qt.Vertical)
@@ -56,49 +174,18 @@ class ChannelStrip(QWidget):
         self.fader.setMaximum(100)
         self.fader.setValue(0)
         self.fader.setFixedHeight(200)
-        self.fader.setStyleSheet("""
-            QSlider {
-                background: transparent;
-            }
-            QSlider::groove:vertical {
-                background: #444;
-                width: 30px;
-                border-radius: 4px;
-            }
-            QSlider::handle:vertical {
-                background: #00a8ff;
-                height: 20px;
-                width: 40px;
-                margin: 0 -5px;
-                border-radius: 3px;
-            }
-        """)
+        self.fader.setObjectName("fader")
         
         # Mute button
         self.mute_btn = QPushButton("M")
         self.mute_btn.setFixedSize(40, 40)
         self.mute_btn.setCheckable(True)
-        self.mute_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #333;
-                color: white;
-                border: 1px solid #555;
-                border-radius: 20px;
-                font-weight: bold;
-            }
-            QPushButton:checked {
-                background-color: #bb0000;
-                color: white;
-            }
-            QPushButton:hover {
-                background-color: #444;
-            }
-        """)
+        self.mute_btn.setObjectName("muteButton")
         
         # Channel label
         self.channel_label = QLabel(f"CH {self.channel_idx + 1}")
         self.channel_label.setAlignment(Qt.AlignCenter)
-        self.channel_label.setStyleSheet("color: #999;")
+        self.channel_label.setObjectName("channelLabel")
         
         # Add widgets to layout
         layout.addWidget(self.app_selector)
@@ -120,17 +207,35 @@ class ChannelStrip(QWidget):
     def set_fader_value(self, value):
         """Set fader value from MIDI (0.0-1.0)"""
         value_percent = int(value * 100)
-        self.fader.blockSignals(True)
-        self.fader.setValue(value_percent)
-        self.fader.blockSignals(False)
+        with QSignalBlocker(self.fader):
+            self.fader.setValue(value_percent)
         self.volume_label.setText(f"{value_percent}%")
         
     def set_app_options(self, apps):
         """Set available apps in the selector"""
-        self.app_selector.clear()
-        self.app_selector.addItem("Not Assigned", None)
-        for idx, name in apps:
-            self.app_selector.addItem(name, idx)
+        # Repaint once after the rebuild instead of once per item
+        self.app_selector.setUpdatesEnabled(False)
+        with QSignalBlocker(self.app_selector):
+            self.app_selector.clear()
+            self.app_selector.addItem("Not Assigned", None)
+            for idx, name in apps:
+                self.app_selector.addItem(name, idx)
+        self.app_selector.setUpdatesEnabled(True)
+    
+    def patch_app_options(self, removed, added):
+        """Remove and add individual apps without rebuilding the selector
+        
+        added holds (position in the new app list, app) pairs in list order.
+        """
+        for idx, name in removed:
+            index = self.app_selector.findData(idx)
+            if index >= 0 and self.app_selector.itemText(index) == name:
+                if index == self.app_selector.currentIndex():
+                    self.app_selector.setCurrentIndex(0)
+                self.app_selector.removeItem(index)
+        # Offset by one for the "Not Assigned" entry
+        for position, (idx, name) in added:
+            self.app_selector.insertItem(position + 1, name, idx)
             
     def get_selected_session(self):
         """Get the selected session index"""
@@ -139,9 +244,8 @@ class ChannelStrip(QWidget):
     def set_mute_state(self, muted):
         """Set mute button state"""
         self.is_muted = muted
-        self.mute_btn.blockSignals(True)
-        self.mute_btn.setChecked(muted)
-        self.mute_btn.blockSignals(False)
+        with QSignalBlocker(self.mute_btn):
+            self.mute_btn.setChecked(muted)
 
 mido.set_backend('mido.backends.rtmidi')
 
@@ -160,8 +264,20 @@ class MIDIHandler(QObject):
         self.fader_values = [0.0] * 8
         self.button_states = [False] * 24
         self.knob_values = [0.0] * 8
-        
-    def get_available_devices(self):
+        self._led_state = [None] * 8  # last LED state sent per S button
+        self._raw_fader = [-1] * 8  # last raw 7-bit value per fader
+        self._raw_knob = [-1] * 8  # last raw 7-bit value per knob
+        self.debug_enabled = False  # emit raw_message_received only when set
+        
+        # CC number -> (handler, channel) lookup table
+        self._cc_map = [None] * 128
+        for channel in range(8):
+            self._cc_map[channel] = (self._handle_fader, channel)  # Faders are CC 0-7
+            self._cc_map[16 + channel] = (self._handle_knob, channel)  # Knobs are CC 16-23
+            self._cc_map[32 + channel] = (self._handle_mute, channel)  # S buttons (mute) are CC 32-39
+        
+    @staticmethod
+    def get_available_devices():
         """Get lists of available MIDI input and output devices"""
         try:
             mido.set_backend('mido.backends.rtmidi')  # Ensure the correct backend is set
@@ -178,7 +294,9 @@ class MIDIHandler(QObject):
             # Close existing connections if any
             self.close()
             
-            self.midi_in = mido.open_input(input_device_name)
+            # RtMidi invokes the callback from its own thread as soon as a
+            # message arrives; signals are delivered to the GUI thread queued
+            self.midi_in = mido.open_input(input_device_name, callback=self._on_midi_msg)
             self.midi_out = mido.open_output(output_device_name)
             self.device_name = input_device_name
             return True
@@ -194,48 +312,60 @@ class MIDIHandler(QObject):
         if self.midi_out:
             self.midi_out.close()
             self.midi_out = None
+        # LED states are unknown until sent to the next device
+        self._led_state = [None] * 8
+        self._raw_fader = [-1] * 8
+        self._raw_knob = [-1] * 8
     
-    def poll_messages(self):
-        """Check for new MIDI messages"""
-        if not self.midi_in:
-            return
-            
-        for msg in self.midi_in.iter_pending():
-            if msg.type == 'control_change':
-                self.process_control_change(msg)
-            # Emit raw message for debug tab
+    def _on_midi_msg(self, msg):
+        """Handle an incoming MIDI message (called on the RtMidi thread)"""
+        if msg.type == 'control_change':
+            self.process_control_change(msg)
+        # Emit raw message for debug tab while it is visible
+        if self.debug_enabled:
             self.raw_message_received.emit(str(msg))
     
     def process_control_change(self, msg):
         """Process MIDI control change messages"""
-        # Faders are CC 0-7
-        if 0 <= msg.control <= 7:
-            channel = msg.control
-            value = msg.value / 127.0
-            self.fader_values[channel] = value
-            self.fader_moved.emit(channel, value)
-            
-        # Knobs are CC 16-23
-        elif 16 <= msg.control <= 23:
-            channel = msg.control - 16
-            value = msg.value / 127.0
-            self.knob_values[channel] = value
-            self.knob_turned.emit(channel, value)
-            
-        # S buttons (mute) are CC 32-39
-        elif 32 <= msg.control <= 39:
-            channel = msg.control - 32
-            state = msg.value >= 64  # Treat values >= 64 as pressed
-            
-            # Only emit if state changed (handles button press and release properly)
-            if self.button_states[channel] != state:
-                self.button_states[channel] = state
-                self.button_pressed.emit(channel, state)
+        entry = self._cc_map[msg.control]
+        if entry is None:
+            return
+        handler, channel = entry
+        handler(channel, msg.value)
+    
+    def _handle_fader(self, channel, raw_value):
+        if self._raw_fader[channel] == raw_value:
+            return
+        self._raw_fader[channel] = raw_value
+        value = raw_value / 127.0
+        self.fader_values[channel] = value
+        self.fader_moved.emit(channel, value)
+    
+    def _handle_knob(self, channel, raw_value):
+        if self._raw_knob[channel] == raw_value:
+            return
+        self._raw_knob[channel] = raw_value
+        value = raw_value / 127.0
+        self.knob_values[channel] = value
+        self.knob_turned.emit(channel, value)
+    
+    def _handle_mute(self, channel, raw_value):
+        state = raw_value >= 64  # Treat values >= 64 as pressed
+        
+        # Only emit if state changed (handles button press and release properly)
+        if self.button_states[channel] != state:
+            self.button_states[channel] = state
+            self.button_pressed.emit(channel, state)
     
     def send_led_feedback(self, button_idx, state):
         """Send LED feedback to the controller for button states"""
         if not self.midi_out:
             return
+        
+        # Skip states the controller is already showing
+        if self._led_state[button_idx] == state:
+            return
+        self._led_state[button_idx] = state
             
         # Map button index to CC number (S buttons are 32-39)
         cc = 32 + button_idx
@@ -244,45 +374,173 @@ class MIDIHandler(QObject):
         self.midi_out.send(msg)
 
 
-class WindowsAudioMixer:
+class SessionEventsCallback(COMObject):
+    """Receives volume/mute change notifications for one audio session"""
+    _com_interfaces_ = [IAudioSessionEvents]
+    
+    def __init__(self, mixer, session_idx):
+        super().__init__()
+        self.mixer = mixer
+        self.session_idx = session_idx
+        
+    def OnSimpleVolumeChanged(self, NewVolume, NewMute, EventContext):
+        event_context = EventContext.contents if EventContext else None
+        self.mixer.notify_volume(self.session_idx, NewVolume, event_context)
+        self.mixer.notify_mute(self.session_idx, bool(NewMute))
+
+
+class MasterVolumeCallback(COMObject):
+    """Receives volume/mute change notifications for the master endpoint"""
+    _com_interfaces_ = [IAudioEndpointVolumeCallback]
+    
+    def __init__(self, mixer):
+        super().__init__()
+        self.mixer = mixer
+        
+    def OnNotify(self, pNotify):
+        self.mixer.notify_volume(-1, pNotify.contents.fMasterVolume,
+                                 pNotify.contents.guidEventContext)
+        self.mixer.notify_mute(-1, bool(pNotify.contents.bMuted))
+
+
+class WindowsAudioMixer(QObject):
+    # Signals (emitted from COM notification threads)
+    mute_changed = Signal(int, bool)  # session index, muted
+    
     def __init__(self):
+        super().__init__()
         self.sessions = []
-        self.update_sessions()
+        self.volume_interfaces = []
+        self.session_callbacks = []
+        self._last_app_list = None
+        self._last_volume = {}  # session index -> last volume scalar set
+        self._last_mute = {}  # session index -> last reported mute state
+        # Event context passed with our own volume changes
+        self._event_context = GUID.create_new()
+        # Sessions are filled in by the first background refresh
         
         # Get master volume controller
         self.master_devices = AudioUtilities.GetSpeakers()
         self.master_interface = self.master_devices.Activate(
             IAudioEndpointVolume._iid_, CLSCTX_ALL, None)
         self.master_volume = cast(self.master_interface, POINTER(IAudioEndpointVolume))
+        self.master_callback = MasterVolumeCallback(self)
+        self.master_volume.RegisterControlChangeNotify(self.master_callback)
+        
+    def enumerate_sessions(self):
+        """Collect audio sessions, their volume interfaces and app names
+        
+        Does not modify the mixer, so it can run off the GUI thread.
+        """
+        # Query the volume interface once per session and reuse it
+        sessions = []
+        volume_interfaces = []
+        for session in AudioUtilities.GetAllSessions():
+            try:
+                volume_interfaces.append(session._ctl.QueryInterface(ISimpleAudioVolume))
+            except Exception as e:
+                print(f"Error querying session volume: {e}")
+                continue
+            sessions.append(session)
         
-    def update_sessions(self):
-        """Update the list of audio sessions"""
-        self.sessions = AudioUtilities.GetAllSessions()
         app_list = []
         
         # Add master volume as first option
         app_list.append((-1, "Master Volume"))
         
         # Add application sessions
-        for i, session in enumerate(self.sessions):
-            if session.Process and session.Process.name():
-                app_list.append((i, session.Process.name()))
-        
+        for i, session in enumerate(sessions):
+            process = session.Process
+            if process is None:
+                continue
+            try:
+                name = process.name()
+            except Exception:
+                # Process exited during enumeration
+                continue
+            if name:
+                app_list.append((i, name))
+        
+        return sessions, volume_interfaces, app_list
+    
+    def apply_sessions(self, sessions, volume_interfaces, app_list):
+        """Switch to sessions collected by enumerate_sessions"""
+        self.unregister_session_callbacks()
+        self._last_volume = {}
+        self._last_mute = {}
+        self.sessions = sessions
+        self.volume_interfaces = volume_interfaces
+        self.register_session_callbacks()
+        
+        # Hand back the previous list object when nothing changed
+        if app_list == self._last_app_list:
+            return self._last_app_list
+        self._last_app_list = app_list
         return app_list
+    
+    def register_session_callbacks(self):
+        """Subscribe to mute/volume change events for every session"""
+        for i, session in enumerate(self.sessions):
+            callback = SessionEventsCallback(self, i)
+            try:
+                session._ctl.RegisterAudioSessionNotification(callback)
+                self.session_callbacks.append((session, callback))
+            except Exception as e:
+                print(f"Error registering session notification: {e}")
+    
+    def unregister_session_callbacks(self):
+        """Unsubscribe from events of the current sessions"""
+        for session, callback in self.session_callbacks:
+            try:
+                session._ctl.UnregisterAudioSessionNotification(callback)
+            except Exception as e:
+                print(f"Error unregistering session notification: {e}")
+        self.session_callbacks = []
+    
+    def is_own_change(self, event_context):
+        """Check if a notification was caused by our own set_volume call"""
+        return event_context == self._event_context
+    
+    def notify_volume(self, session_idx, volume, event_context):
+        """Record a volume change reported by the audio system"""
+        # Our own volume changes are already in the cache; a late notification
+        # for one of them must not overwrite a newer value
+        if event_context is not None and self.is_own_change(event_context):
+            return
+        self._last_volume[session_idx] = volume
+    
+    def notify_mute(self, session_idx, muted):
+        """Emit mute_changed if the reported mute state differs from the last one"""
+        if self._last_mute.get(session_idx) == muted:
+            return
+        self._last_mute[session_idx] = muted
+        self.mute_changed.emit(session_idx, muted)
+    
+    def close(self):
+        """Unsubscribe from all audio notifications"""
+        self.unregister_session_callbacks()
+        try:
+            self.master_volume.UnregisterControlChangeNotify(self.master_callback)
+        except Exception as e:
+            print(f"Error unregistering master notification: {e}")
         
     def set_volume(self, session_idx, volume):
         """Set volume for a specific session"""
+        # Skip values within one 7-bit MIDI step of what was last set
+        if abs(self._last_volume.get(session_idx, -1) - volume) < 0.004:
+            return
         try:
             # Handle master volume separately
             if session_idx == -1:
-                self.master_volume.SetMasterVolumeLevelScalar(volume, None)
+                self.master_volume.SetMasterVolumeLevelScalar(volume, byref(self._event_context))
+                self._last_volume[session_idx] = volume
                 return
                 
             # Handle app volume
-            if 0 <= session_idx < len(self.sessions):
-                session = self.sessions[session_idx]
-                volume_interface = session._ctl.QueryInterface(ISimpleAudioVolume)
-                volume_interface.SetMasterVolume(volume, None)
+            if 0 <= session_idx < len(self.volume_interfaces):
+                volume_interface = self.volume_interfaces[session_idx]
+                volume_interface.SetMasterVolume(volume, byref(self._event_context))
+                self._last_volume[session_idx] = volume
         except Exception as e:
             print(f"Error setting volume: {e}")
     
@@ -296,9 +554,8 @@ class WindowsAudioMixer:
                 return not current_mute
                 
             # Handle app mute
-            if 0 <= session_idx < len(self.sessions):
-                session = self.sessions[session_idx]
-                volume_interface = session._ctl.QueryInterface(ISimpleAudioVolume)
+            if 0 <= session_idx < len(self.volume_interfaces):
+                volume_interface = self.volume_interfaces[session_idx]
                 current_mute = volume_interface.GetMute()
                 volume_interface.SetMute(not current_mute, None)
                 return not current_mute
@@ -314,9 +571,8 @@ class WindowsAudioMixer:
                 return self.master_volume.GetMute()
                 
             # Handle app mute
-            if 0 <= session_idx < len(self.sessions):
-                session = self.sessions[session_idx]
-                volume_interface = session._ctl.QueryInterface(ISimpleAudioVolume)
+            if 0 <= session_idx < len(self.volume_interfaces):
+                volume_interface = self.volume_interfaces[session_idx]
                 return volume_interface.GetMute()
         except Exception as e:
             print(f"Error checking mute status: {e}")
@@ -330,15 +586,45 @@ class WindowsAudioMixer:
                 return self.master_volume.GetMasterVolumeLevelScalar()
                 
             # Handle app volume
-            if 0 <= session_idx < len(self.sessions):
-                session = self.sessions[session_idx]
-                volume_interface = session._ctl.QueryInterface(ISimpleAudioVolume)
+            if 0 <= session_idx < len(self.volume_interfaces):
+                volume_interface = self.volume_interfaces[session_idx]
                 return volume_interface.GetMasterVolume()
         except Exception as e:
             print(f"Error getting volume: {e}")
         return 0.0
 
 
+class SessionRefreshSignals(QObject):
+    sessions_ready = Signal(object)  # (sessions, volume interfaces, app list)
+    finished = Signal()
+
+
+class SessionRefreshTask(QRunnable):
+    """Enumerates audio sessions on a thread pool thread"""
+    def __init__(self, audio_mixer):
+        super().__init__()
+        self.audio_mixer = audio_mixer
+        self.signals = SessionRefreshSignals()
+        
+    def run(self):
+        # Background threads join the MTA. The GUI thread keeps the STA that
+        # comtypes sets up on import, which Qt's OLE clipboard and drag and
+        # drop support require. Core Audio objects are free-threaded, so
+        # calls from either apartment go straight to the object.
+        try:
+            comtypes.CoInitializeEx(comtypes.COINIT_MULTITHREADED)
+            try:
+                # The mixer itself is only updated on the GUI thread
+                result = self.audio_mixer.enumerate_sessions()
+                self.signals.sessions_ready.emit(result)
+            finally:
+                comtypes.CoUninitialize()
+        except Exception as e:
+            print(f"Error refreshing audio sessions: {e}")
+        finally:
+            self.signals.finished.emit()
+
+
 class DeviceSelectionDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -347,7 +633,6 @@ class DeviceSelectionDialog(QDialog):
         self.setup_ui()
         
         # Get available devices
-        self.midi_handler = MIDIHandler()
         self.refresh_device_lists()
         
     def setup_ui(self):
@@ -357,110 +642,37 @@ class DeviceSelectionDialog(QDialog):
         title_label = QLabel("Select MIDI Device")
         title_label.setFont(QFont("Arial", 14, QFont.Bold))
         title_label.setAlignment(Qt.AlignCenter)
-        title_label.setStyleSheet("color: white; margin-bottom: 15px;")
+        title_label.setObjectName("dialogTitle")
         
         # Input device selection
         input_label = QLabel("Input Device:")
-        input_label.setStyleSheet("color: white;")
         self.input_combo = QComboBox()
-        self.input_combo.setStyleSheet("""
-            QComboBox {
-                background-color: #333;
-                color: white;
-                border: 1px solid #555;
-                border-radius: 4px;
-                padding: 6px;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #333;
-                color: white;
-                selection-background-color: #555;
-            }
-        """)
+        self.input_combo.setObjectName("deviceCombo")
         
         # Output device selection
         output_label = QLabel("Output Device:")
-        output_label.setStyleSheet("color: white;")
         self.output_combo = QComboBox()
-        self.output_combo.setStyleSheet("""
-            QComboBox {
-                background-color: #333;
-                color: white;
-                border: 1px solid #555;
-                border-radius: 4px;
-                padding: 6px;
-            }
-            QComboBox QAbstractItemView {
-                background-color: #333;
-                color: white;
-                selection-background-color: #555;
-            }
-        """)
+        self.output_combo.setObjectName("deviceCombo")
         
         # Auto-select nanokontrol2 checkbox
         self.auto_select_box = QPushButton("Auto-detect nanoKONTROL2")
-        self.auto_select_box.setStyleSheet("""
-            QPushButton {
-                background-color: #2980b9;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 12px;
-            }
-            QPushButton:hover {
-                background-color: #3498db;
-            }
-        """)
+        self.auto_select_box.setObjectName("autoSelectButton")
         self.auto_select_box.clicked.connect(self.auto_select_nanokontrol)
         
         # Refresh button
         refresh_btn = QPushButton("Refresh Device List")
-        refresh_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #27ae60;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 12px;
-            }
-            QPushButton:hover {
-                background-color: #2ecc71;
-            }
-        """)
+        refresh_btn.setObjectName("refreshDevicesButton")
         refresh_btn.clicked.connect(self.refresh_device_lists)
         
         # Button layout
         button_layout = QHBoxLayout()
         
         connect_btn = QPushButton("Connect")
-        connect_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2980b9;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 16px;
-                font-weight: bold;
-            }
-            QPushButton:hover {
-                background-color: #3498db;
-            }
-        """)
+        connect_btn.setObjectName("connectButton")
         connect_btn.clicked.connect(self.accept)
         
         cancel_btn = QPushButton("Cancel")
-        cancel_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #7f8c8d;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 8px 16px;
-            }
-            QPushButton:hover {
-                background-color: #95a5a6;
-            }
-        """)
+        cancel_btn.setObjectName("cancelButton")
         cancel_btn.clicked.connect(self.reject)
         
         button_layout.addWidget(connect_btn)
@@ -477,12 +689,9 @@ class DeviceSelectionDialog(QDialog):
         layout.addStretch()
         layout.addLayout(button_layout)
         
-        # Set dialog style
-        self.setStyleSheet("background-color: #1e1e1e;")
-        
     def refresh_device_lists(self):
         """Refresh the lists of available MIDI devices"""
-        input_devices, output_devices = self.midi_handler.get_available_devices()
+        input_devices, output_devices = MIDIHandler.get_available_devices()
         
         self.input_combo.clear()
         self.output_combo.clear()
@@ -538,12 +747,26 @@ class MainWindow(QMainWindow):
         # Connect signals
         self.midi_handler.fader_moved.connect(self.on_midi_fader_moved)
         self.midi_handler.button_pressed.connect(self.on_midi_button_pressed)
-        self.midi_handler.raw_message_received.connect(self.on_raw_message_received)
-        
-        # Update timer
-        self.update_timer = QTimer(self)
-        self.update_timer.setInterval(50)  # 50ms interval
-        self.update_timer.timeout.connect(self.update_loop)
+        self.audio_mixer.mute_changed.connect(self.on_audio_mute_changed)
+        
+        # App list currently shown in the channel strip selectors
+        self._last_apps = None
+        self._refreshing_apps = False
+        
+        # Latest fader volume per channel, flushed to the audio system in batches
+        self._pending_volumes = [None] * 8
+        self.volume_flush_timer = QTimer(self)
+        self.volume_flush_timer.setSingleShot(True)
+        self.volume_flush_timer.setInterval(8)  # ~120Hz
+        self.volume_flush_timer.timeout.connect(self._flush_volumes)
+        
+        # Last 100 raw MIDI messages, redrawn into the debug tab in batches
+        self._debug_buf = deque(maxlen=100)
+        self._debug_dirty = False
+        self.debug_timer = QTimer(self)
+        self.debug_timer.setSingleShot(True)
+        self.debug_timer.setInterval(100)
+        self.debug_timer.timeout.connect(self._flush_debug_text)
         
         # Show device selection dialog
         self.show_device_selection()
@@ -560,23 +783,16 @@ class MainWindow(QMainWindow):
         self.main_tab = QWidget()
         self.setup_main_tab()
         
-        # Debug tab
+        # Debug tab (contents are built the first time it is opened)
         self.debug_tab = QWidget()
-        self.setup_debug_tab()
+        self.debug_text = None
         
         self.tabs.addTab(self.main_tab, "Main")
         self.tabs.addTab(self.debug_tab, "Debug")
+        self.tabs.currentChanged.connect(self.on_tab_changed)
         
         main_layout.addWidget(self.tabs)
         self.setCentralWidget(main_widget)
-        
-        # Set style
-        self.setStyleSheet("""
-            QMainWindow, QWidget {
-                background-color: #1e1e1e;
-                color: white;
-            }
-        """)
     
     def setup_main_tab(self):
         layout = QVBoxLayout(self.main_tab)
@@ -588,25 +804,14 @@ class MainWindow(QMainWindow):
         title_label = QLabel("MIDI Mixer Control")
         title_label.setAlignment(Qt.AlignLeft | Qt.AlignVCenter)
         title_label.setFont(QFont("Arial", 18, QFont.Bold))
-        title_label.setStyleSheet("color: white; margin: 10px;")
+        title_label.setObjectName("mainTitle")
         
         # Device info and change button
         self.device_info_label = QLabel("No device connected")
-        self.device_info_label.setStyleSheet("color: #999;")
+        self.device_info_label.setObjectName("deviceInfoLabel")
         
         self.change_device_btn = QPushButton("Change Device")
-        self.change_device_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2980b9;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 6px 12px;
-            }
-            QPushButton:hover {
-                background-color: #3498db;
-            }
-        """)
+        self.change_device_btn.setObjectName("changeDeviceButton")
         self.change_device_btn.clicked.connect(self.show_device_selection)
         
         header_layout.addWidget(title_label, 1)
@@ -616,25 +821,14 @@ class MainWindow(QMainWindow):
         # Status bar
         status_frame = QFrame()
         status_frame.setFrameShape(QFrame.StyledPanel)
-        status_frame.setStyleSheet("background-color: #222; border-radius: 4px;")
+        status_frame.setObjectName("statusFrame")
         status_layout = QHBoxLayout(status_frame)
         
         self.status_label = QLabel("Disconnected")
-        self.status_label.setStyleSheet("color: #999;")
+        self.status_label.setObjectName("statusLabel")
         
         self.refresh_btn = QPushButton("Refresh Apps")
-        self.refresh_btn.setStyleSheet("""
-            QPushButton {
-                background-color: #2980b9;
-                color: white;
-                border: none;
-                border-radius: 4px;
-                padding: 6px 12px;
-            }
-            QPushButton:hover {
-                background-color: #3498db;
-            }
-        """)
+        self.refresh_btn.setObjectName("refreshAppsButton")
         self.refresh_btn.clicked.connect(self.update_app_list)
         
         status_layout.addWidget(self.status_label)
@@ -649,6 +843,10 @@ class MainWindow(QMainWindow):
         self.channel_strips = []
         for i in range(8):
             strip = ChannelStrip(i)
+            strip.app_selector.currentIndexChanged.connect(
+                lambda _, strip=strip: self.sync_mute_state(strip))
+            strip.mute_btn.clicked.connect(
+                lambda _, channel=i: self.toggle_channel_mute(channel))
             strips_layout.addWidget(strip)
             self.channel_strips.append(strip)
         
@@ -662,15 +860,19 @@ class MainWindow(QMainWindow):
         
         self.debug_text = QTextEdit()
         self.debug_text.setReadOnly(True)
-        self.debug_text.setStyleSheet("""
-            QTextEdit {
-                background-color: #222;
-                color: #0f0;
-                font-family: Consolas, monospace;
-            }
-        """)
+        self.debug_text.setObjectName("debugText")
         
         layout.addWidget(self.debug_text)
+        
+        # Only collect raw messages once there is somewhere to show them
+        self.midi_handler.raw_message_received.connect(self.on_raw_message_received)
+    
+    def on_tab_changed(self, index):
+        """Build the debug tab on first use and only log MIDI while it is shown"""
+        debug_visible = self.tabs.widget(index) is self.debug_tab
+        if debug_visible and self.debug_text is None:
+            self.setup_debug_tab()
+        self.midi_handler.debug_enabled = debug_visible
     
     def setup_tray_icon(self):
         self.tray_icon = QSystemTrayIcon(self)
@@ -706,16 +908,19 @@ class MainWindow(QMainWindow):
             event.ignore()
         else:
             # Clean up resources
-            self.update_timer.stop()
             self.midi_handler.close()
+            self.audio_mixer.close()
             super().closeEvent(event)
     
+    def set_status(self, text, state):
+        """Set the status text; state selects its color in the stylesheet"""
+        self.status_label.setText(text)
+        self.status_label.setProperty("state", state)
+        self.status_label.style().unpolish(self.status_label)
+        self.status_label.style().polish(self.status_label)
+    
     def show_device_selection(self):
         """Show device selection dialog"""
-        # Stop the update timer if it's running
-        if hasattr(self, 'update_timer') and self.update_timer.isActive():
-            self.update_timer.stop()
-        
         # Close existing MIDI connection
         self.midi_handler.close()
         
@@ -726,20 +931,46 @@ class MainWindow(QMainWindow):
             
             # Connect to selected devices
             if self.midi_handler.connect_device(input_device, output_device):
-                self.status_label.setText(f"Connected to MIDI device")
-                self.status_label.setStyleSheet("color: #00ff00;")
+                self.set_status("Connected to MIDI device", "connected")
                 self.device_info_label.setText(f"Device: {input_device}")
-                self.update_timer.start()
                 self.update_app_list()
             else:
-                self.status_label.setText("Failed to connect to MIDI device")
-                self.status_label.setStyleSheet("color: #ff0000;")
+                self.set_status("Failed to connect to MIDI device", "error")
                 QMessageBox.warning(self, "Connection Error", 
                                    "Failed to connect to the selected MIDI device. Please try again.")
     
     def update_app_list(self):
-        """Update the list of audio applications"""
-        apps = self.audio_mixer.update_sessions()
+        """Refresh the list of audio applications in the background"""
+        if self._refreshing_apps:
+            return
+        self._refreshing_apps = True
+        task = SessionRefreshTask(self.audio_mixer)
+        task.signals.sessions_ready.connect(self._apply_app_list)
+        task.signals.finished.connect(self._on_app_refresh_finished)
+        QThreadPool.globalInstance().start(task)
+    
+    def _on_app_refresh_finished(self):
+        """Allow the next refresh once the background task is done"""
+        self._refreshing_apps = False
+    
+    def _apply_app_list(self, result):
+        """Switch the mixer to refreshed sessions and update the selectors"""
+        # Queued volumes still refer to the old session indices
+        self._flush_volumes()
+        apps = self.audio_mixer.apply_sessions(*result)
+        if apps is self._last_apps:
+            return
+        
+        old_apps, self._last_apps = self._last_apps, apps
+        if old_apps is not None:
+            removed = [app for app in old_apps if app not in apps]
+            added = [(i, app) for i, app in enumerate(apps) if app not in old_apps]
+            # Patch the selectors in place when only a few apps changed
+            if len(removed) + len(added) <= MAX_PATCHED_APPS:
+                for strip in self.channel_strips:
+                    strip.patch_app_options(removed, added)
+                return
+        
         for strip in self.channel_strips:
             current_app = strip.get_selected_session()
             strip.set_app_options(apps)
@@ -750,19 +981,17 @@ class MainWindow(QMainWindow):
                 if index >= 0:
                     strip.app_selector.setCurrentIndex(index)
     
-    def update_loop(self):
-        """Main update loop"""
-        # Poll MIDI messages
-        self.midi_handler.poll_messages()
-        
-        # Update UI to reflect audio state
+    def sync_mute_state(self, strip):
+        """Read the mute state of the strip's newly selected session"""
+        session_idx = strip.get_selected_session()
+        if session_idx is not None:
+            strip.set_mute_state(self.audio_mixer.is_muted(session_idx))
+    
+    def on_audio_mute_changed(self, session_idx, muted):
+        """Handle mute changes reported by the audio system"""
         for strip in self.channel_strips:
-            session_idx = strip.get_selected_session()
-            if session_idx is not None:
-                # Update mute state from actual audio state
-                muted = self.audio_mixer.is_muted(session_idx)
-                if muted != strip.is_muted:
-                    strip.set_mute_state(muted)
+            if strip.get_selected_session() == session_idx and muted != strip.is_muted:
+                strip.set_mute_state(muted)
     
     def on_midi_fader_moved(self, channel, value):
         """Handle MIDI fader movement"""
@@ -770,36 +999,64 @@ class MainWindow(QMainWindow):
             strip = self.channel_strips[channel]
             strip.set_fader_value(value)
             
-            # Update audio if assigned
+            # Queue audio update if assigned; intermediate values are dropped
             session_idx = strip.get_selected_session()
             if session_idx is not None:
+                self._pending_volumes[channel] = (session_idx, value)
+                if not self.volume_flush_timer.isActive():
+                    self.volume_flush_timer.start()
+    
+    def _flush_volumes(self):
+        """Apply the latest queued fader volumes"""
+        for channel, pending in enumerate(self._pending_volumes):
+            if pending is not None:
+                session_idx, value = pending
                 self.audio_mixer.set_volume(session_idx, value)
+                self._pending_volumes[channel] = None
     
     def on_midi_button_pressed(self, channel, state):
         """Handle MIDI button press (specifically the mute buttons)"""
         if 0 <= channel < len(self.channel_strips):
-            strip = self.channel_strips[channel]
-            session_idx = strip.get_selected_session()
-            
-            if session_idx is not None:
-                # Toggle mute state
-                new_mute_state = self.audio_mixer.toggle_mute(session_idx)
-                strip.set_mute_state(new_mute_state)
-                # Send LED feedback to controller
-                self.midi_handler.send_led_feedback(channel, new_mute_state)
+            self.toggle_channel_mute(channel)
+    
+    def toggle_channel_mute(self, channel):
+        """Toggle mute of the channel's session and update the strip and LED"""
+        strip = self.channel_strips[channel]
+        session_idx = strip.get_selected_session()
+        
+        if session_idx is None:
+            # Nothing to mute; undo an on-screen toggle
+            strip.set_mute_state(False)
+            return
+        
+        # Toggle mute state
+        new_mute_state = self.audio_mixer.toggle_mute(session_idx)
+        strip.set_mute_state(new_mute_state)
+        # Send LED feedback to controller
+        self.midi_handler.send_led_feedback(channel, new_mute_state)
     
     def on_raw_message_received(self, message):
         """Handle raw MIDI messages for debug tab"""
-        self.debug_text.append(message)
-        # Keep only the last 100 lines to prevent memory issues
-        cursor = self.debug_text.textCursor()
-        cursor.movePosition(cursor.Start)
-        cursor.movePosition(cursor.Down, cursor.KeepAnchor, 100)
-        cursor.removeSelectedText()
+        self._debug_buf.append(message)
+        self._debug_dirty = True
+        if not self.debug_timer.isActive():
+            self.debug_timer.start()
+    
+    def _flush_debug_text(self):
+        """Redraw the debug log from the message buffer"""
+        if not self._debug_dirty:
+            return
+        self._debug_dirty = False
+        self.debug_text.setPlainText("\n".join(self._debug_buf))
+        self.debug_text.moveCursor(QTextCursor.End)
 
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
+    # Fusion draws with the palette; the native Windows style ignores most of it
+    app.setStyle("Fusion")
+    app.setPalette(build_dark_palette())
+    app.setStyleSheet(APP_QSS)
     
     # Ensure the application doesn't quit when last window is closed
     app.setQuitOnLastWindowClosed(False)